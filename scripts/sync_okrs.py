@@ -1,10 +1,14 @@
 import os
 import re
-import json
+import heapq
+import functools
+import asyncio
 import datetime as dt
-from typing import Any, Dict, List, Optional, Tuple
-import requests
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import httpx
+import orjson
 from dotenv import load_dotenv
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 load_dotenv()
 
@@ -17,6 +21,18 @@ NOTION_BASE = "https://api.notion.com/v1"
 LINEAR_BASE = "https://api.linear.app/graphql"
 
 HEADER = "Weekly Linear update log"
+SLUG_RE = re.compile(r"/project/([^/?#]+)")
+# Linear project slug -> id map persisted between runs (restored by the workflow's cache step).
+SLUG_CACHE_FILE = ".slug_cache.json"
+# Optional rich_text property on the OKR database caching the HEADER block id, so the page isn't re-scanned each week.
+LOG_HEADING_ID_PROP = "_weekly_log_block_id"
+
+# Pages are processed concurrently; cap in-flight pages to stay inside Notion/Linear rate limits.
+MAX_CONCURRENT_PAGES = 8
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ATTEMPTS = 6  # first try + 5 retries
+RETRY_MAX_WAIT = 30
+BACKOFF = wait_random_exponential(multiplier=0.5, max=RETRY_MAX_WAIT)
 
 def notion_headers():
     return {
@@ -31,27 +47,76 @@ def linear_headers():
         "Content-Type": "application/json",
     }
 
+def make_client(headers: Dict[str, str]) -> httpx.AsyncClient:
+    # One client per host. HTTP/2 multiplexes the concurrent page requests over a single TLS connection.
+    return httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        limits=httpx.Limits(max_connections=20),
+        timeout=30,
+    )
+
+def is_retryable(exc: BaseException, idempotent: bool = True) -> bool:
+    # Non-idempotent calls (block appends) are only retried when the request provably wasn't applied:
+    # a 429, or a connection that was never established. A lost response could otherwise duplicate the append.
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or (idempotent and status in RETRY_STATUSES)
+    if idempotent:
+        return isinstance(exc, httpx.TransportError)
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+def wait_retry_after(retry_state: RetryCallState) -> float:
+    # Honour the server's Retry-After (Notion sends it on 429s); otherwise back off exponentially with jitter.
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    headers = exc.response.headers if isinstance(exc, httpx.HTTPStatusError) else {}
+    try:
+        return min(float(headers["Retry-After"]), RETRY_MAX_WAIT)
+    except (KeyError, ValueError):
+        return BACKOFF(retry_state)
+
+async def request_json(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    payload: Optional[Union[Dict[str, Any], bytes]] = None,
+    idempotent: bool = True,
+) -> Dict[str, Any]:
+    # Bodies are encoded/decoded with orjson; large Linear issue pages make stdlib json noticeable.
+    # Payloads may also arrive already encoded (see graphql_body_prefix).
+    body = orjson.dumps(payload) if isinstance(payload, dict) else payload
+    # Rate limits (429) and transient 5xx/connection errors are retried up to RETRY_ATTEMPTS times.
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception(lambda exc: is_retryable(exc, idempotent)),
+        wait=wait_retry_after,
+        stop=stop_after_attempt(RETRY_ATTEMPTS),
+        reraise=True,
+    ):
+        with attempt:
+            resp = await client.request(method, url, content=body)
+            if resp.is_error:
+                print(f"{method} {url} error: {resp.status_code} - {resp.text}")
+            resp.raise_for_status()
+            return orjson.loads(resp.content)
+
 def linear_slug_from_project_url(url: str) -> Optional[str]:
     # Example: https://linear.app/tinyfish/project/authentication-workflows-9cb6b72850e3
-    m = re.search(r"/project/([^/?#]+)", url or "")
+    m = SLUG_RE.search(url or "")
     return m.group(1) if m else None
 
-def linear_graphql(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
-    resp = requests.post(
-        LINEAR_BASE,
-        headers=linear_headers(),
-        json={"query": query, "variables": variables},
-        timeout=30,
-    )
-    if not resp.ok:
-        print(f"Linear API error: {resp.status_code} - {resp.text}")
-    resp.raise_for_status()
-    data = resp.json()
+@functools.lru_cache(maxsize=None)
+def graphql_body_prefix(query: str) -> bytes:
+    # The query text is static, so encode it once and only encode variables per call.
+    return b'{"query":' + orjson.dumps(query) + b',"variables":'
+
+async def linear_graphql(linear: httpx.AsyncClient, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    body = graphql_body_prefix(query) + orjson.dumps(variables) + b"}"
+    data = await request_json(linear, "POST", LINEAR_BASE, payload=body)
     if "errors" in data:
         raise RuntimeError(data["errors"])
     return data["data"]
 
-def notion_db_query(database_id: str) -> List[Dict[str, Any]]:
+async def notion_db_query(notion: httpx.AsyncClient, database_id: str) -> AsyncIterator[Dict[str, Any]]:
     # Filter: Linear project URL is not empty
     url = f"{NOTION_BASE}/databases/{database_id}/query"
     payload = {
@@ -60,21 +125,23 @@ def notion_db_query(database_id: str) -> List[Dict[str, Any]]:
             "url": {
                 "is_not_empty": True
             }
-        }
+        },
+        "page_size": 100,  # Notion max
     }
-    results = []
-    next_cursor = None
-    while True:
-        if next_cursor:
-            payload["start_cursor"] = next_cursor
-        r = requests.post(url, headers=notion_headers(), json=payload, timeout=30)
-        r.raise_for_status()
-        j = r.json()
-        results.extend(j["results"])
-        if not j.get("has_more"):
-            break
-        next_cursor = j.get("next_cursor")
-    return results
+    fetch = asyncio.ensure_future(request_json(notion, "POST", url, payload=payload))
+    try:
+        while True:
+            j = await fetch
+            if j.get("has_more"):
+                # Prefetch the next page while the caller works through this one.
+                next_payload = {**payload, "start_cursor": j.get("next_cursor")}
+                fetch = asyncio.ensure_future(request_json(notion, "POST", url, payload=next_payload))
+            for row in j["results"]:
+                yield row
+            if not j.get("has_more"):
+                break
+    finally:
+        fetch.cancel()
 
 def notion_get_page_markdown(page_id: str) -> str:
     """
@@ -84,79 +151,43 @@ def notion_get_page_markdown(page_id: str) -> str:
     """
     raise NotImplementedError("See note below: use blocks API to append content under a heading.")
 
-def notion_update_page_property(page_id: str, latest_update: str) -> None:
+async def notion_update_page_property(notion: httpx.AsyncClient, page_id: str, text: str, prop_name: str = "Latest update") -> None:
     url = f"{NOTION_BASE}/pages/{page_id}"
     payload = {
         "properties": {
-            "Latest update": {
-                "rich_text": [{"text": {"content": latest_update[:2000]}}]
+            prop_name: {
+                "rich_text": [{"text": {"content": text[:2000]}}]
             }
         }
     }
-    r = requests.patch(url, headers=notion_headers(), json=payload, timeout=30)
-    r.raise_for_status()
+    await request_json(notion, "PATCH", url, payload=payload)
 
-def notion_append_weekly_log_blocks(page_id: str, exec_update: str, project_name: str) -> None:
-    """
-    Append-only: add a new bulleted list item under the heading `### Weekly Linear update log`.
-    Implementation strategy (recommended):
-      1) Find or create the heading block on the page.
-      2) Append a bulleted list item as a child under that heading.
-    """
-    # 1) List top-level blocks
-    blocks_url = f"{NOTION_BASE}/blocks/{page_id}/children?page_size=100"
-    blocks = []
-    next_cursor = None
-    while True:
-        u = blocks_url + (f"&start_cursor={next_cursor}" if next_cursor else "")
-        r = requests.get(u, headers=notion_headers(), timeout=30)
-        r.raise_for_status()
-        j = r.json()
-        blocks.extend(j["results"])
-        if not j.get("has_more"):
-            break
-        next_cursor = j.get("next_cursor")
-
-    # 2) Find heading_3 with text == HEADER
-    heading_block_id = None
+def find_log_heading(blocks: List[Dict[str, Any]]) -> Optional[str]:
+    # heading_3 block whose text == HEADER
     for b in blocks:
         if b.get("type") == "heading_3":
             rt = b["heading_3"].get("rich_text", [])
             text = "".join([x.get("plain_text", "") for x in rt]).strip()
             if text == HEADER:
-                heading_block_id = b["id"]
-                break
-
-    # 3) Create heading if missing
-    if heading_block_id is None:
-        create_payload = {
-            "children": [
-                {
-                    "object": "block",
-                    "type": "heading_3",
-                    "heading_3": {"rich_text": [{"type": "text", "text": {"content": HEADER}}]}
-                }
-            ]
-        }
-        r = requests.patch(f"{NOTION_BASE}/blocks/{page_id}/children", headers=notion_headers(), json=create_payload, timeout=30)
-        r.raise_for_status()
-        # refresh blocks to get the new heading id
-        r2 = requests.get(f"{NOTION_BASE}/blocks/{page_id}/children?page_size=100", headers=notion_headers(), timeout=30)
-        r2.raise_for_status()
-        for b in r2.json()["results"]:
-            if b.get("type") == "heading_3":
-                rt = b["heading_3"].get("rich_text", [])
-                text = "".join([x.get("plain_text", "") for x in rt]).strip()
-                if text == HEADER:
-                    heading_block_id = b["id"]
-                    break
-
-    if heading_block_id is None:
-        raise RuntimeError("Could not create/find Weekly Linear update log heading")
-
-    # 4) Append bullet as child blocks under the heading
-    today = dt.date.today().isoformat()
-    bullet_title = f"{today} — {project_name}"
+                return b["id"]
+    return None
+
+async def notion_append_weekly_log_blocks(
+    notion: httpx.AsyncClient,
+    page_id: str,
+    exec_update: str,
+    project_name: str,
+    today_iso: str,
+    heading_block_id: Optional[str] = None,
+) -> str:
+    """
+    Append-only: add a new bulleted list item under the heading `### Weekly Linear update log`.
+    Implementation strategy (recommended):
+      1) Find the heading block on the page (skipped when a cached `heading_block_id` is passed in).
+      2) Append a bulleted list item right after that heading, or create heading + item together if missing.
+    Returns the heading block id so the caller can cache it for next week.
+    """
+    bullet_title = f"{today_iso} — {project_name}"
 
     # Break exec_update into sub-bullets (simple: split by lines that start with "- " or use fixed sections)
     sublines = [line.strip() for line in exec_update.splitlines() if line.strip()]
@@ -180,93 +211,209 @@ def notion_append_weekly_log_blocks(page_id: str, exec_update: str, project_name
             },
         }
     ]
+    children_url = f"{NOTION_BASE}/blocks/{page_id}/children"
+
+    # 0) Cached heading: append directly; if it no longer exists, fall through to discovery.
+    if heading_block_id:
+        try:
+            await request_json(notion, "PATCH", children_url, payload={"children": children, "after": heading_block_id}, idempotent=False)
+            return heading_block_id
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (400, 404):
+                raise
+            print(f"Cached log heading {heading_block_id} not usable on page {page_id}; searching page blocks")
+            heading_block_id = None
+
+    # 1) Page through top-level blocks, 2) stopping at the first heading_3 with text == HEADER
+    blocks_url = f"{children_url}?page_size=100"
+    next_cursor = None
+    while True:
+        u = blocks_url + (f"&start_cursor={next_cursor}" if next_cursor else "")
+        j = await request_json(notion, "GET", u)
+        heading_block_id = find_log_heading(j["results"])
+        if heading_block_id or not j.get("has_more"):
+            break
+        next_cursor = j.get("next_cursor")
 
+    # 3) Heading missing: create it with the bullet beneath it in a single request (appended at the end of the page)
+    if heading_block_id is None:
+        heading = {
+            "object": "block",
+            "type": "heading_3",
+            "heading_3": {"rich_text": [{"type": "text", "text": {"content": HEADER}}]}
+        }
+        j = await request_json(notion, "PATCH", children_url, payload={"children": [heading] + children}, idempotent=False)
+        # Created blocks come back in order, so the first one is the new heading.
+        return j["results"][0]["id"]
+
+    # 4) Append bullet as child blocks under the heading
     payload = {"children": children, "after": heading_block_id}
-    r = requests.patch(f"{NOTION_BASE}/blocks/{page_id}/children", headers=notion_headers(), json=payload, timeout=30)
-    if not r.ok:
-        print(f"Notion append error: {r.status_code} - {r.text}")
-    r.raise_for_status()
+    await request_json(notion, "PATCH", children_url, payload=payload, idempotent=False)
+    return heading_block_id
+
+ISSUE_FIELDS = """
+fragment IssueFields on Issue {
+  identifier
+  title
+  updatedAt
+  state { name type }
+}
+"""
+
+# Server-side superset of the states bucket_issue can report: by type, or by a matching state name
+# (custom states such as an "In Review" of type unstarted). bucket_issue still makes the final call.
+ISSUE_STATE_FILTER = """or: [
+      { state: { type: { in: ["started", "completed"] } } }
+      { state: { name: { containsIgnoreCase: "review" } } }
+      { state: { name: { containsIgnoreCase: "progress" } } }
+      { state: { name: { containsIgnoreCase: "done" } } }
+      { state: { name: { containsIgnoreCase: "completed" } } }
+    ]"""
+
+# Project metadata and the first page of its issues in a single round trip.
+PROJECT_FIELDS = """
+fragment ProjectFields on Project {
+  id
+  name
+  state
+  health
+  projectUpdates(first: 1) {
+    nodes { body createdAt user { name } }
+  }
+  issues(first: 250, orderBy: updatedAt, filter: { %s }) {
+    nodes { ...IssueFields }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+""" % ISSUE_STATE_FILTER + ISSUE_FIELDS
 
 PROJECT_QUERY = """
 query ProjectBySlug($slug: String!) {
-  projects(filter: { slugId: { eq: $slug } }) {
-    nodes {
-      id
-      name
-      lead { name }
-      state
-      health
-      updatedAt
-      projectUpdates(first: 1) {
-        nodes { body createdAt user { name } }
-      }
-    }
+  projects(first: 1, filter: { slugId: { eq: $slug } }) {
+    nodes { ...ProjectFields }
   }
 }
-"""
+""" + PROJECT_FIELDS
+
+# Same selection, looked up by id once the slug has been resolved (see SLUG_CACHE_FILE).
+PROJECT_BY_ID_QUERY = """
+query ProjectById($id: String!) {
+  project(id: $id) { ...ProjectFields }
+}
+""" + PROJECT_FIELDS
 
 ISSUES_QUERY = """
 query IssuesByProject($projectId: ID!, $after: String) {
   issues(
-    filter: { project: { id: { eq: $projectId } } }
+    filter: { project: { id: { eq: $projectId } }, %s }
     first: 250
     after: $after
     orderBy: updatedAt
   ) {
-    nodes {
-      identifier
-      title
-      url
-      updatedAt
-      state { name type }
-    }
+    nodes { ...IssueFields }
     pageInfo { hasNextPage endCursor }
   }
 }
-"""
-
-def fetch_project_and_issues(project_slug: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
-    pdata = linear_graphql(PROJECT_QUERY, {"slug": project_slug})
-    nodes = pdata["projects"]["nodes"]
-    if not nodes:
-        raise RuntimeError(f"No Linear project found for slug: {project_slug}")
-    project = nodes[0]
-
-    issues = []
-    after = None
+""" % ISSUE_STATE_FILTER + ISSUE_FIELDS
+
+def load_slug_cache() -> Dict[str, str]:
+    try:
+        with open(SLUG_CACHE_FILE, "rb") as f:
+            return orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+
+def save_slug_cache(slug_cache: Dict[str, str]) -> None:
+    with open(SLUG_CACHE_FILE, "wb") as f:
+        f.write(orjson.dumps(slug_cache, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+async def fetch_project(linear: httpx.AsyncClient, project_slug: str, slug_cache: Dict[str, str]) -> Dict[str, Any]:
+    # The returned project still carries its first page of issues; consume them with iter_issues.
+    project = None
+    project_id = slug_cache.get(project_slug)
+    if project_id:
+        try:
+            project = (await linear_graphql(linear, PROJECT_BY_ID_QUERY, {"id": project_id}))["project"]
+        except (RuntimeError, httpx.HTTPStatusError) as e:
+            # GraphQL errors (2xx) or a non-retryable 4xx mean a stale entry (project deleted/moved);
+            # exhausted 429/5xx retries are a real failure.
+            reason = str(e)
+            if isinstance(e, httpx.HTTPStatusError):
+                status = e.response.status_code
+                if status == 429 or not 400 <= status < 500:
+                    raise
+                reason = f"HTTP {status}"
+            print(f"Cached Linear project {project_id} for {project_slug} failed ({reason}); looking up by slug")
+    if project is None:
+        # Drop the mapping first so a failed re-resolve doesn't keep the stale id around.
+        slug_cache.pop(project_slug, None)
+        pdata = await linear_graphql(linear, PROJECT_QUERY, {"slug": project_slug})
+        nodes = pdata["projects"]["nodes"]
+        if not nodes:
+            raise RuntimeError(f"No Linear project found for slug: {project_slug}")
+        project = nodes[0]
+    slug_cache[project_slug] = project["id"]
+    return project
+
+async def iter_issues(linear: httpx.AsyncClient, project: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    # Yields issues page by page so only one page of nodes is held at a time.
+    page = project.pop("issues")
     while True:
-        idata = linear_graphql(ISSUES_QUERY, {"projectId": project["id"], "after": after})
-        chunk = idata["issues"]["nodes"]
-        issues.extend(chunk)
-        page = idata["issues"]["pageInfo"]
-        if not page["hasNextPage"]:
+        for it in page["nodes"]:
+            yield it
+        # Only projects with more than one page of issues need follow-up requests.
+        if not page["pageInfo"]["hasNextPage"]:
             break
-        after = page["endCursor"]
-        if len(issues) > 2000:
-            break  # safety cap
+        idata = await linear_graphql(linear, ISSUES_QUERY, {"projectId": project["id"], "after": page["pageInfo"]["endCursor"]})
+        page = idata["issues"]
 
-    return project, issues
+# Linear "state.type" commonly: started, completed, canceled, backlog, unstarted
+# We'll map to the buckets you asked for.
+STATE_TYPE_BUCKET = {"completed": "done", "started": "in_progress"}
+STATE_NAME_BUCKET = {"done": "done", "completed": "done", "in progress": "in_progress", "in-progress": "in_progress"}
 
 def bucket_issue(state_type: str, state_name: str) -> str:
-    # Linear "state.type" commonly: started, completed, canceled, backlog, unstarted
-    # We'll map to the buckets you asked for.
-    st = (state_type or "").lower()
+    by_type = STATE_TYPE_BUCKET.get((state_type or "").lower())
     name = (state_name or "").lower()
+    by_name = STATE_NAME_BUCKET.get(name)
 
-    if st == "completed" or name in {"done", "completed"}:
+    if by_type == "done" or by_name == "done":
         return "done"
     if "review" in name:
         return "in_review"
-    if st == "started" or name in {"in progress", "in-progress"}:
-        return "in_progress"
-    # default
-    return "other"
+    # in_progress by type or name, else "other"
+    return by_type or by_name or "other"
 
 def top_titles(issues: List[Dict[str, Any]], n: int = 5) -> List[str]:
-    issues_sorted = sorted(issues, key=lambda x: x.get("updatedAt", ""), reverse=True)
-    return [f"{i['identifier']}: {i['title']}" for i in issues_sorted[:n]]
-
-def format_exec_update(project: Dict[str, Any], issues: List[Dict[str, Any]]) -> str:
+    newest = heapq.nlargest(n, issues, key=lambda x: x.get("updatedAt", ""))
+    return [f"{i['identifier']}: {i['title']}" for i in newest]
+
+async def tally_issues(issues: AsyncIterator[Dict[str, Any]], n: int = 5) -> Tuple[Dict[str, int], Dict[str, List[Dict[str, Any]]]]:
+    # One pass: count every bucket but only keep its n most recently updated issues (bounded min-heaps).
+    counts = {"done": 0, "in_review": 0, "in_progress": 0}
+    heaps: Dict[str, List[Tuple[str, int, Dict[str, Any]]]] = {bucket: [] for bucket in counts}
+    seq = 0
+    async for it in issues:
+        seq += 1
+        bucket = bucket_issue(it["state"].get("type"), it["state"].get("name"))
+        if bucket == "other":
+            continue
+        counts[bucket] += 1
+        # -seq breaks updatedAt ties in favour of the earlier issue, like a stable sort would.
+        entry = (it.get("updatedAt", ""), -seq, it)
+        if len(heaps[bucket]) < n:
+            heapq.heappush(heaps[bucket], entry)
+        else:
+            heapq.heappushpop(heaps[bucket], entry)
+    newest = {bucket: [e[2] for e in sorted(heap, reverse=True)] for bucket, heap in heaps.items()}
+    return counts, newest
+
+def format_exec_update(
+    project: Dict[str, Any],
+    counts: Dict[str, int],
+    newest: Dict[str, List[Dict[str, Any]]],
+    today: dt.date,
+) -> str:
     # Most recent project update (only if within past 7 days)
     updates = project.get("projectUpdates", {}).get("nodes", [])
     recent = None
@@ -274,35 +421,23 @@ def format_exec_update(project: Dict[str, Any], issues: List[Dict[str, Any]]) ->
         u = updates[0]
         created_str = u['createdAt'][:10]  # "2026-02-20T..." -> "2026-02-20"
         created_date = dt.date.fromisoformat(created_str)
-        days_ago = (dt.date.today() - created_date).days
+        days_ago = (today - created_date).days
         if days_ago <= 7:
             body_clean = u['body'][:400].replace('\n', ' ')
             recent = f"**Most recent update** ({days_ago}d ago, {u['user']['name']}): {body_clean}"
 
-    done = []
-    in_review = []
-    in_progress = []
-    for it in issues:
-        bucket = bucket_issue(it["state"].get("type"), it["state"].get("name"))
-        if bucket == "done":
-            done.append(it)
-        elif bucket == "in_review":
-            in_review.append(it)
-        elif bucket == "in_progress":
-            in_progress.append(it)
-
     lines = []
     
     if recent:
         lines.append(recent)
 
-    if done or in_review:
-        completed_titles = top_titles(done + in_review)
-        lines.append(f"**Completed/In Review** ({len(done)} done, {len(in_review)} in review): " + "; ".join(completed_titles))
+    if counts["done"] or counts["in_review"]:
+        completed_titles = top_titles(newest["done"] + newest["in_review"])
+        lines.append(f"**Completed/In Review** ({counts['done']} done, {counts['in_review']} in review): " + "; ".join(completed_titles))
 
-    if in_progress:
-        prog_titles = top_titles(in_progress)
-        lines.append(f"**In Progress** ({len(in_progress)}): " + "; ".join(prog_titles))
+    if counts["in_progress"]:
+        prog_titles = top_titles(newest["in_progress"])
+        lines.append(f"**In Progress** ({counts['in_progress']}): " + "; ".join(prog_titles))
 
     health = project.get('health', 'unknown')
     state = project.get('state', 'unknown')
@@ -310,32 +445,82 @@ def format_exec_update(project: Dict[str, Any], issues: List[Dict[str, Any]]) ->
 
     return "\n".join(lines)
 
-def main():
-    pages = notion_db_query(NOTION_OKR_DATABASE_ID)
-    print(f"Found {len(pages)} OKR rows with Linear project URLs")
-
-    for p in pages:
-        page_id = p["id"]
-        props = p["properties"]
-
-        linear_url = props["Linear project URL"]["url"]
-        slug = linear_slug_from_project_url(linear_url)
-        if not slug:
-            print(f"Skipping page {page_id}: cannot parse Linear slug from {linear_url}")
-            continue
-
-        objective = "".join([t["plain_text"] for t in props["Objective"]["title"]]).strip()
-
-        project, issues = fetch_project_and_issues(slug)
-        exec_update = format_exec_update(project, issues)
-
-        # 1) Overwrite Latest update
-        notion_update_page_property(page_id, exec_update)
-
-        # 2) Append to Weekly Linear update log in page body (append-only)
-        notion_append_weekly_log_blocks(page_id, exec_update, project.get("name") or objective)
+async def process_page(
+    notion: httpx.AsyncClient,
+    linear: httpx.AsyncClient,
+    p: Dict[str, Any],
+    slug_cache: Dict[str, str],
+    today: dt.date,
+) -> None:
+    page_id = p["id"]
+    props = p["properties"]
+
+    linear_url = props["Linear project URL"]["url"]
+    slug = linear_slug_from_project_url(linear_url)
+    if not slug:
+        print(f"Skipping page {page_id}: cannot parse Linear slug from {linear_url}")
+        return
+
+    objective = "".join([t["plain_text"] for t in props["Objective"]["title"]]).strip()
+
+    project = await fetch_project(linear, slug, slug_cache)
+    counts, newest = await tally_issues(iter_issues(linear, project))
+    exec_update = format_exec_update(project, counts, newest, today)
+
+    # Heading id cache is opt-in: it is only read/written when the database has the property.
+    cache_heading = LOG_HEADING_ID_PROP in props
+    cached_heading_id = None
+    if cache_heading:
+        cached_heading_id = "".join([t["plain_text"] for t in props[LOG_HEADING_ID_PROP]["rich_text"]]).strip() or None
+
+    # 1) Overwrite Latest update and 2) append to Weekly Linear update log in page body (append-only).
+    # The two writes are independent, so they go out concurrently.
+    _, heading_block_id = await asyncio.gather(
+        notion_update_page_property(notion, page_id, exec_update),
+        notion_append_weekly_log_blocks(notion, page_id, exec_update, project.get("name") or objective, today.isoformat(), cached_heading_id),
+    )
 
-        print(f"Updated: {objective} ({slug})")
+    if cache_heading and heading_block_id != cached_heading_id:
+        await notion_update_page_property(notion, page_id, heading_block_id, LOG_HEADING_ID_PROP)
+
+    print(f"Updated: {objective} ({slug})")
+
+async def main():
+    slug_cache = load_slug_cache()
+    # One date for the whole run, so every page's log entry agrees even if the run crosses midnight.
+    today = dt.date.today()
+
+    try:
+        async with make_client(notion_headers()) as notion, make_client(linear_headers()) as linear:
+            sem = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+            async def bounded(p: Dict[str, Any]) -> None:
+                async with sem:
+                    await process_page(notion, linear, p, slug_cache, today)
+
+            # Start syncing rows as soon as each query page arrives rather than after the full listing.
+            pages = []
+            tasks = []
+            try:
+                async for p in notion_db_query(notion, NOTION_OKR_DATABASE_ID):
+                    pages.append(p)
+                    tasks.append(asyncio.ensure_future(bounded(p)))
+            except Exception:
+                # Listing failed part-way: let rows already started finish before the clients close.
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            print(f"Found {len(pages)} OKR rows with Linear project URLs")
+
+            # Pages are independent: one failure is reported without aborting the others.
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        save_slug_cache(slug_cache)
+
+    failures = [(p, r) for p, r in zip(pages, results) if isinstance(r, BaseException)]
+    for p, err in failures:
+        print(f"Failed: page {p['id']}: {err!r}")
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(pages)} OKR pages failed to sync")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())